@@ -1,5 +1,6 @@
-import matplotlib.pyplot as plt
-from tqdm import tqdm
+import sys
+
+import numpy as np
 
 from products import Stock
 from traders import Trader, MarketMaker, DumbTrader
@@ -7,62 +8,110 @@ from market import MarketState, MatchingEngine, OrderBook
 from model import Trade
 
 
-def clear_trades(players: dict[str, Trader], trades: list[Trade]):
-    for trade in trades:
-        players[trade.buyer_id].cash -= trade.price
-        players[trade.buyer_id].lots += trade.size
-        players[trade.seller_id].cash += trade.price
-        players[trade.seller_id].lots -= trade.size
+def clear_trades(cash: np.ndarray, lots: np.ndarray, trades: list[Trade]):
+    if not trades:
+        return
+    n = len(trades)
+    buyers = np.fromiter((trade.buyer_id for trade in trades), dtype=np.intp, count=n)
+    sellers = np.fromiter((trade.seller_id for trade in trades), dtype=np.intp, count=n)
+    sizes = np.fromiter((trade.size for trade in trades), dtype=np.float64, count=n)
+    prices = np.fromiter((trade.price for trade in trades), dtype=np.float64, count=n)
+    # The unbuffered .at variants apply repeated trader indices correctly.
+    np.subtract.at(cash, buyers, prices)
+    np.add.at(lots, buyers, sizes)
+    np.add.at(cash, sellers, prices)
+    np.subtract.at(lots, sellers, sizes)
 
 
-def main():
-    N = int(1e5)
-    stock = Stock(base_price=100)
-    order_book = OrderBook(bids=[], asks=[])
+def run_simulation(N: int, stock: Stock, players: list[Trader], tracked: Trader) -> np.ndarray:
+    # The whole per-step pipeline (walk, order generation, matching,
+    # clearing, portfolio tracking) lives in this one function with all hot
+    # state in locals, so a run crosses into it exactly once. It is also
+    # the seam to compile wholesale should that ever be worth the build
+    # tooling.
+    order_book = OrderBook()
     matching_engine = MatchingEngine()
-    players: list[Trader] = [
-        MarketMaker(
-            markup_factor=0.01
-        ),  # DumbTraders need at least 1 marketmaker in the market
-        DumbTrader(initial_cash=5000, initial_lots=100, trade_size=10),
-        DumbTrader(initial_cash=5000, initial_lots=100, trade_size=10),
-    ]
-    trader = DumbTrader(initial_cash=50000, initial_lots=80, trade_size=5)
-    players.append(trader)
-    player_id_mapping: dict[str, Trader] = {player.id: player for player in players}
-    trader_portfolio = []
+    # Reassign the ids to positions in the players list, so the state
+    # arrays below are indexable by id regardless of how many traders the
+    # process-wide counter has already handed out.
+    for idx, player in enumerate(players):
+        player.id = idx
+    # Trader state lives in parallel arrays indexed by trader id so trades
+    # clear with vectorized indexed adds instead of per-trade dict lookups.
+    cash = np.array([player.cash for player in players], dtype=np.float64)
+    lots = np.array([player.lots for player in players], dtype=np.float64)
+    # Preallocated instead of a growing list; assigned by index in the loop.
+    trader_portfolio = np.empty(N, dtype=np.float64)
+    # One vectorized call for the entire random walk instead of one scipy
+    # draw per iteration.
+    rng = np.random.default_rng()
+    walk = rng.normal(stock.mu, stock.sigma, N)
+    # Bind the hot methods to locals once; inside the loop each use is then
+    # a plain LOAD_FAST instead of an attribute lookup per iteration.
+    simulate_one_step = stock.simulate_one_step
+    add_orders = order_book.add_orders
+    clear_book = order_book.clear_book
+    match_orders = matching_engine.match_orders
+    order_generators = [player.generate_orders for player in players]
+    trader_id = tracked.id
+    # Imported here so batch runs of the simulation don't need it loaded.
+    from tqdm import tqdm
+
     for t in tqdm(range(1, N + 1)):
         # Setup
-        stock.simulate_one_step()
+        simulate_one_step(step=walk[t - 1])
 
         # Generating orders for each player
         market_state = MarketState(
             orderbook=order_book,
             true_price=stock.price,
         )
-        for player in players:
-            orders = player.generate_orders(market_state=market_state)
-            for order in orders:
-                order_book.add_order_to_book(order=order)
+        for generate_orders in order_generators:
+            add_orders(generate_orders(market_state=market_state))
 
         # Trading
-        trades = matching_engine.match_orders(book=order_book)
+        trades = match_orders(book=order_book)
 
         # Clearing
-        clear_trades(players=player_id_mapping, trades=trades)
+        clear_trades(cash=cash, lots=lots, trades=trades)
 
         # Calculating the size of our trader's portfolio
-        trader_portfolio.append(trader.get_portfolio_value(stock.price))
-        if trader_portfolio[-1] < 0:
+        trader_portfolio[t - 1] = cash[trader_id] + lots[trader_id] * stock.price
+        if trader_portfolio[t - 1] < 0:
             print(f"Trader went bankrupt at time {t}")
             break
 
         # Whole order book is cleared each iteration
-        order_book.clear_book()
+        clear_book()
+
+    # Truncate in case of early bankruptcy; this is a zero-copy view.
+    return trader_portfolio[:t]  # type: ignore
+
+
+def main(plot: bool = True):
+    N = int(1e5)
+    stock = Stock(base_price=100)
+    players: list[Trader] = [
+        MarketMaker(
+            markup_factor=0.01
+        ),  # DumbTraders need at least 1 marketmaker in the market
+        DumbTrader(initial_cash=5000, initial_lots=100, trade_size=10),
+        DumbTrader(initial_cash=5000, initial_lots=100, trade_size=10),
+    ]
+    trader = DumbTrader(initial_cash=50000, initial_lots=80, trade_size=5)
+    players.append(trader)
+    trader_portfolio = run_simulation(N=N, stock=stock, players=players, tracked=trader)
+
+    if plot:
+        # matplotlib is only needed for the plot at the very end, and its
+        # import is heavy, so keep it out of the module load.
+        import matplotlib.pyplot as plt
 
-    plt.plot(range(1, t + 1), trader_portfolio)  # type: ignore
-    plt.show()
+        plt.plot(range(1, trader_portfolio.size + 1), trader_portfolio)
+        plt.show()
+    else:
+        np.save("portfolio.npy", trader_portfolio)
 
 
 if __name__ == "__main__":
-    main()
+    main(plot="--no-plot" not in sys.argv)
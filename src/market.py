@@ -1,14 +1,35 @@
 from dataclasses import dataclass
-from operator import attrgetter
+from heapq import heappop, heappush
+from itertools import count
 from typing import Union
 
+import numpy as np
+from numba import njit
+
 from model import Order, OrderSide, Trade
 
 
-@dataclass
 class OrderBook:
-    bids: list[Order]
-    asks: list[Order]
+    def __init__(self) -> None:
+        # Both sides are min-heaps of [key, seq, order] entries, indexed by
+        # side so every operation is a dict lookup instead of an if/elif
+        # branch (an unknown side raises KeyError straight from the lookup).
+        # The key is -side * price, which negates bid prices so the top of
+        # either heap is the best price on that side; seq breaks price ties
+        # in arrival order. Cancelling only drops the id from the entry
+        # table and leaves a tombstone (order set to None) in the heap,
+        # which is popped lazily once it reaches the top.
+        self._heaps: dict[int, list[list]] = {OrderSide.bid: [], OrderSide.ask: []}
+        self._entries: dict[int, list] = {}
+        self._seq = count()
+        # Cached best orders, kept fresh on add and invalidated when the
+        # cached order is cancelled (None means "recompute from the heap").
+        self._best: dict[int, Union[Order, None]] = {
+            OrderSide.bid: None,
+            OrderSide.ask: None,
+        }
+        # Live order counts per side, so size checks don't scan anything.
+        self._n_live: dict[int, int] = {OrderSide.bid: 0, OrderSide.ask: 0}
 
     def __str__(self) -> str:
         best_bid = self.get_best_bid()
@@ -17,103 +38,202 @@ class OrderBook:
         return f"Best bid is {best_bid} and best ask is {best_ask}"
 
     def add_order_to_book(self, order: Order):
-        if order.side == OrderSide.ask:
-            self.asks.append(order)
-        elif order.side == OrderSide.bid:
-            self.bids.append(order)
-        else:
-            raise KeyError(f"Invalid order side {order.side}")
+        side = order.side
+        key = -side * order.price
+        entry = [key, next(self._seq), order]
+        heappush(self._heaps[side], entry)
+        self._entries[order.id] = entry
+        self._n_live[side] += 1
+        best = self._best[side]
+        if best is not None and key < -side * best.price:
+            self._best[side] = order
+
+    def add_orders(self, orders: list[Order]):
+        # Batched add: the table lookups are hoisted once per batch rather
+        # than resolved per order.
+        heaps = self._heaps
+        entries = self._entries
+        n_live = self._n_live
+        best = self._best
+        seq = self._seq
+        for order in orders:
+            side = order.side
+            key = -side * order.price
+            entry = [key, next(seq), order]
+            heappush(heaps[side], entry)
+            entries[order.id] = entry
+            n_live[side] += 1
+            cur = best[side]
+            if cur is not None and key < -side * cur.price:
+                best[side] = order
+
+    def _peek_best(self, heap: list[list]) -> Union[Order, None]:
+        while heap:
+            order = heap[0][2]
+            if order is not None:
+                return order
+            heappop(heap)
+        return None
+
+    def _get_best(self, side: int) -> Union[Order, None]:
+        best = self._best[side]
+        if best is None:
+            best = self._best[side] = self._peek_best(self._heaps[side])
+        return best
 
     def get_best_bid(self) -> Union[Order, None]:
-        if len(self.bids) == 0:
-            return None
-        return max(self.bids, key=attrgetter("price"))
+        return self._get_best(OrderSide.bid)
 
     def get_best_ask(self) -> Union[Order, None]:
-        if len(self.asks) == 0:
-            return None
-        return min(self.asks, key=attrgetter("price"))
+        return self._get_best(OrderSide.ask)
+
+    def live_orders(self, side: int) -> list[Order]:
+        return [e[2] for e in self._entries.values() if e[2].side == side]
+
+    def n_orders(self, side: int) -> int:
+        return self._n_live[side]
 
     def cancel_order(self, order: Order):
-        if order.side == OrderSide.bid:
-            self.bids = [bid for bid in self.bids if not bid.id == order.id]
-        elif order.side == OrderSide.ask:
-            self.asks = [ask for ask in self.asks if not ask.id == order.id]
-        else:
-            raise KeyError(f"Invalid order side {order.side}")
+        entry = self._entries.pop(order.id, None)
+        if entry is not None:
+            entry[2] = None
+            self._n_live[order.side] -= 1
+            if order is self._best[order.side]:
+                self._best[order.side] = None
 
     def amend_order(self, order: Order):
-        if order.side == OrderSide.bid:
-            self.bids = [bid for bid in self.bids if not bid.id == order.id]
-            self.bids.append(order)
-        elif order.side == OrderSide.ask:
-            self.asks = [ask for ask in self.asks if not ask.id == order.id]
-            self.asks.append(order)
-        else:
-            raise KeyError(f"Invalid order side {order.side}")
+        self.cancel_order(order)
+        self.add_order_to_book(order)
 
     def clear_book(self):
-        self.bids = []
-        self.asks = []
+        for heap in self._heaps.values():
+            heap.clear()
+        self._entries.clear()
+        self._best[OrderSide.bid] = None
+        self._best[OrderSide.ask] = None
+        self._n_live[OrderSide.bid] = 0
+        self._n_live[OrderSide.ask] = 0
+
+
+@njit(cache=True)
+def _match_kernel(
+    bid_prices, bid_sizes, ask_prices, ask_sizes, trade_bids, trade_asks, trade_sizes, trade_prices
+) -> int:
+    # Walks both best-first sorted sides with plain float compares and no
+    # Python objects. Sizes are decremented in place to the residual fill,
+    # and each trade is recorded as (bid index, ask index, size, mid price).
+    n_trades = 0
+    i = 0
+    j = 0
+    while i < bid_prices.shape[0] and j < ask_prices.shape[0]:
+        bid_price = bid_prices[i]
+        ask_price = ask_prices[j]
+        if bid_price < ask_price:
+            break  # No (more) trades possible
+        size = min(bid_sizes[i], ask_sizes[j])
+        trade_bids[n_trades] = i
+        trade_asks[n_trades] = j
+        trade_sizes[n_trades] = size
+        trade_prices[n_trades] = (bid_price + ask_price) / 2
+        n_trades += 1
+        bid_sizes[i] -= size
+        ask_sizes[j] -= size
+        if bid_sizes[i] == 0.0:
+            i += 1
+        if ask_sizes[j] == 0.0:
+            j += 1
+    return n_trades
 
 
 class MatchingEngine:
     def __init__(self) -> None:
         pass
 
-    def _cross_orders(self, bid: Order, ask: Order) -> Trade:
-        mid_price = (bid.price + ask.price) / 2
-        size = min(bid.size, ask.size)
-        return Trade(
-            buyer_id=bid.sender_id,
-            seller_id=ask.sender_id,
-            size=size,
-            price=mid_price,
-        )
-
-    def match_orders(self, book: OrderBook) -> list[Trade]:
-        # We order them from worst to best, such that we can use pop to get
-        # the last and thus best bid and ask from the arrays.
-        sorted_bids = sorted(book.bids, key=lambda order: order.price, reverse=False)
-        sorted_asks = sorted(book.asks, key=lambda order: order.price, reverse=True)
-
-        # No bids and/or asks so no trades
-        if len(sorted_bids) == 0 or len(sorted_asks) == 0:
-            return []
-
-        best_bid = sorted_bids.pop()
-        best_ask = sorted_asks.pop()
+    def _match_small(self, book: OrderBook) -> list[Trade]:
         trades: list[Trade] = []
-        while True:
-            if not best_bid.price >= best_ask.price:
+        best_bid = book.get_best_bid()
+        best_ask = book.get_best_ask()
+        while best_bid is not None and best_ask is not None:
+            if best_bid.price < best_ask.price:
                 break  # No (more) trades possible
-            trade = self._cross_orders(bid=best_bid, ask=best_ask)
-            trades.append(trade)
-            if best_bid.size > best_ask.size:
-                book.cancel_order(best_ask)
-                if len(sorted_asks) == 0:
-                    break
-                best_ask = sorted_asks.pop()
-                best_bid.size -= trade.size
-            elif best_bid.size < best_ask.size:
-                book.cancel_order(best_bid)
-                if len(sorted_bids) == 0:
-                    break
-                best_bid = sorted_bids.pop()
-                best_ask.size -= trade.size
-            elif best_bid.size == best_ask.size:
+            size = min(best_bid.size, best_ask.size)
+            trades.append(
+                Trade(
+                    buyer_id=best_bid.sender_id,
+                    seller_id=best_ask.sender_id,
+                    size=size,
+                    price=(best_bid.price + best_ask.price) / 2,
+                )
+            )
+            best_bid.size -= size
+            best_ask.size -= size
+            if best_bid.size == 0:
                 book.cancel_order(best_bid)
+                best_bid = book.get_best_bid()
+            if best_ask.size == 0:
                 book.cancel_order(best_ask)
-                if len(sorted_bids) == 0:
-                    break
-                if len(sorted_asks) == 0:
-                    break
-                best_bid = sorted_bids.pop()
-                best_ask = sorted_asks.pop()
-
-        # Best bid and ask get amended as the size might've changed
-        book.add_order_to_book(best_bid)
-        book.add_order_to_book(best_ask)
+                best_ask = book.get_best_ask()
+        return trades
+
+    def match_orders(self, book: OrderBook) -> list[Trade]:
+        n_bids = book.n_orders(OrderSide.bid)
+        n_asks = book.n_orders(OrderSide.ask)
+        if n_bids == 0 or n_asks == 0:
+            return []
+
+        # In main()'s workload the book holds at most a couple of orders per
+        # side, where the array gather, argsort and kernel call cost more
+        # than they save. Match those tiny books directly off the heaps.
+        if n_bids <= 2 and n_asks <= 2:
+            return self._match_small(book)
+
+        bids = book.live_orders(OrderSide.bid)
+        asks = book.live_orders(OrderSide.ask)
+
+        # Gather the book into parallel price/size arrays (SoA), best price
+        # first, so the matching loop itself runs compiled.
+        bid_prices = np.array([order.price for order in bids])
+        ask_prices = np.array([order.price for order in asks])
+        bid_order = np.argsort(-bid_prices)
+        ask_order = np.argsort(ask_prices)
+        bids = [bids[i] for i in bid_order]
+        asks = [asks[i] for i in ask_order]
+        bid_prices = bid_prices[bid_order]
+        ask_prices = ask_prices[ask_order]
+        bid_sizes = np.array([float(order.size) for order in bids])
+        ask_sizes = np.array([float(order.size) for order in asks])
+
+        max_trades = len(bids) + len(asks)
+        trade_bids = np.empty(max_trades, dtype=np.intp)
+        trade_asks = np.empty(max_trades, dtype=np.intp)
+        trade_sizes = np.empty(max_trades)
+        trade_prices = np.empty(max_trades)
+        n_trades = _match_kernel(
+            bid_prices, bid_sizes, ask_prices, ask_sizes, trade_bids, trade_asks, trade_sizes, trade_prices
+        )
+
+        trades = [
+            Trade(
+                buyer_id=bids[trade_bids[k]].sender_id,
+                seller_id=asks[trade_asks[k]].sender_id,
+                size=float(trade_sizes[k]),
+                price=float(trade_prices[k]),
+            )
+            for k in range(n_trades)
+        ]
+
+        # Reconcile the residual sizes back into the book: fully filled
+        # orders are cancelled, a partial fill keeps its decremented size.
+        for order, size in zip(bids, bid_sizes):
+            if size == 0.0:
+                book.cancel_order(order)
+            else:
+                order.size = float(size)
+        for order, size in zip(asks, ask_sizes):
+            if size == 0.0:
+                book.cancel_order(order)
+            else:
+                order.size = float(size)
 
         return trades
 
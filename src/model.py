@@ -1,31 +1,38 @@
 from dataclasses import dataclass, field
-from enum import Enum, auto
-from uuid import uuid4
+from itertools import count
 
 
-class OrderSide(Enum):
-    bid = auto()
-    ask = auto()
+class OrderSide:
+    # Plain int constants instead of an Enum: side checks run millions of
+    # times per simulation and an int compare is much cheaper than
+    # Enum.__eq__. The sign doubles as the direction of the order.
+    bid = 1
+    ask = -1
 
 
-@dataclass
+# Ids only need to be unique within the process, so a monotonic counter is
+# plenty and much cheaper than drawing a uuid per order.
+_next_id = count().__next__
+
+
+@dataclass(slots=True, eq=False, repr=False)
 class Order:
     price: float
     size: float
-    side: OrderSide
-    sender_id: str
-    id: str = field(init=False)
+    side: int
+    sender_id: int
+    id: int = field(init=False)
 
     def __post_init__(self):
-        self.id = str(uuid4())
+        self.id = _next_id()
 
     def __str__(self) -> str:
         return f"{self.price:.3f} ({self.size} lots)"
 
 
-@dataclass
+@dataclass(slots=True, eq=False, repr=False)
 class Trade:
-    buyer_id: str
-    seller_id: str
+    buyer_id: int
+    seller_id: int
     size: float
     price: float
@@ -1,6 +1,3 @@
-from scipy import stats
-
-
 class Stock:
     def __init__(self, base_price: float) -> None:
         self.price = base_price
@@ -9,5 +6,7 @@ class Stock:
         self.mu = 0
         self.sigma = 0.25
 
-    def simulate_one_step(self):
-        self.price += float(stats.norm.rvs(loc=self.mu, scale=self.sigma, size=1))
+    def simulate_one_step(self, step: float):
+        # The step is pre-drawn in a single batched rng call by the caller,
+        # which is far cheaper than one scipy rvs call per step.
+        self.price += step
@@ -1,14 +1,23 @@
 from abc import ABC, abstractmethod
+from itertools import count
 from typing import Union
-from uuid import uuid4
-from scipy import stats
-from market import MarketState
 
+import numpy as np
+
+from market import MarketState
 from model import Order, OrderSide
 
+_next_trader_id = count().__next__
+
+_rng = np.random.default_rng()
+
+# Number of normals drawn per batched rng call. One vectorized call amortizes
+# the per-call rng overhead over thousands of draws.
+_DRAW_BATCH = 4096
+
 
 class Trader(ABC):
-    id: str
+    id: int
     cash: Union[int, float]
     lots: Union[int, float]
 
@@ -32,7 +41,7 @@ class MarketMaker(Trader):
     def __init__(self, markup_factor: float) -> None:
         self.markup = markup_factor
         self.size = 100
-        self.id = str(uuid4())
+        self.id = _next_trader_id()
         self.cash = 10e10
         self.lots = 10e10
 
@@ -45,12 +54,18 @@ class MarketMaker(Trader):
         return Order(price=ask, size=self.size, side=OrderSide.ask, sender_id=self.id)
 
     def generate_orders(self, market_state: MarketState) -> list[Order]:
-        orders = []
-        bid = self._offer_bid(price=market_state.true_price)
-        orders.append(bid)
-        ask = self._offer_ask(price=market_state.true_price)
-        orders.append(ask)
-        return orders
+        # Both quotes are built in one pass, sharing the price, size and
+        # sender reads instead of going through _offer_bid/_offer_ask.
+        price = market_state.true_price
+        size = self.size
+        sender = self.id
+        bid = Order(
+            price=price * (1 - self.markup), size=size, side=OrderSide.bid, sender_id=sender
+        )
+        ask = Order(
+            price=price * (1 + self.markup), size=size, side=OrderSide.ask, sender_id=sender
+        )
+        return [bid, ask]
 
 
 class DumbTrader(Trader):
@@ -63,20 +78,41 @@ class DumbTrader(Trader):
     ) -> None:
         self.size = trade_size
         self.vol = volatility
-        self.id = str(uuid4())
+        self.id = _next_trader_id()
         self.cash = initial_cash
         self.lots = initial_lots
+        # Pre-drawn noise and side buffers, refilled in batches.
+        self._noise = np.empty(0)
+        self._noise_pos = 0
+        self._bid_sides = np.empty(0, dtype=bool)
+        self._side_pos = 0
+
+    def _next_noise(self) -> float:
+        if self._noise_pos == self._noise.size:
+            self._noise = _rng.normal(0.0, self.vol, _DRAW_BATCH)
+            self._noise_pos = 0
+        noise = self._noise[self._noise_pos]
+        self._noise_pos += 1
+        return float(noise)
+
+    def _next_side(self) -> int:
+        if self._side_pos == self._bid_sides.size:
+            self._bid_sides = _rng.standard_normal(_DRAW_BATCH) > 0
+            self._side_pos = 0
+        is_bid = self._bid_sides[self._side_pos]
+        self._side_pos += 1
+        return OrderSide.bid if is_bid else OrderSide.ask
 
     def _offer_bid(self, price: float) -> Order:
-        bid = float(stats.norm.rvs(loc=price, scale=self.vol))
+        bid = price + self._next_noise()
         return Order(price=bid, size=self.size, side=OrderSide.bid, sender_id=self.id)
 
     def _offer_ask(self, price: float) -> Order:
-        ask = float(stats.norm.rvs(loc=price, scale=self.vol))
+        ask = price + self._next_noise()
         return Order(price=ask, size=self.size, side=OrderSide.ask, sender_id=self.id)
 
     def generate_orders(self, market_state: MarketState) -> list[Order]:
-        random_side = OrderSide.bid if float(stats.norm.rvs()) > 0 else OrderSide.ask
+        random_side = self._next_side()
         best_bid = market_state.orderbook.get_best_bid()
         best_ask = market_state.orderbook.get_best_ask()
         if best_bid and best_ask: